@@ -0,0 +1,224 @@
+import math
+import os
+import logging
+import threading
+import time
+from flask import jsonify, request, g
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.db import DatabasePoolTimeout
+
+logger = logging.getLogger(__name__)
+
+# Per-client token bucket
+RATE_LIMIT_PER_SECOND = float(os.getenv('RATE_LIMIT_PER_SECOND', 20))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 40))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv('RATE_LIMIT_MAX_CLIENTS', 10000))
+# Number of reverse proxies in front of the app whose X-Forwarded-For is trusted
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+
+# Global concurrency limits per route class
+CONCURRENCY_LIMITS = {
+    'read': int(os.getenv('CONCURRENCY_LIMIT_READ', 32)),
+    'write': int(os.getenv('CONCURRENCY_LIMIT_WRITE', 8)),
+    'bulk': int(os.getenv('CONCURRENCY_LIMIT_BULK', 4)),
+}
+# How long a request may wait for a concurrency slot before being shed
+ADMISSION_WAIT_TIMEOUT = float(os.getenv('ADMISSION_WAIT_TIMEOUT', 0.05))
+OVERLOAD_RETRY_AFTER = int(os.getenv('OVERLOAD_RETRY_AFTER', 1))
+
+# Endpoints that are never throttled
+EXEMPT_ENDPOINTS = {'index', 'health', 'static', 'profile'}
+# Endpoints that return unbounded result sets
+BULK_ENDPOINTS = {'get_users'}
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, now, tokens=1):
+        """
+        Try to take `tokens` from the bucket
+
+        Returns:
+            float: 0 if admitted, otherwise seconds until enough tokens are available
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0
+        return (tokens - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-client token bucket rate limiter"""
+
+    def __init__(self, rate, capacity, max_clients):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_clients = max_clients
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def check(self, client_id):
+        """Returns 0 if the request is admitted, otherwise the suggested retry delay"""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client_id)
+            if bucket is None:
+                if len(self.buckets) >= self.max_clients:
+                    self._evict_idle(now)
+                bucket = self.buckets[client_id] = TokenBucket(self.rate, self.capacity)
+            return bucket.consume(now)
+
+    def _evict_idle(self, now):
+        """Drop buckets that have refilled completely; they carry no state"""
+        refill_time = self.capacity / self.rate
+        idle = [key for key, bucket in self.buckets.items() if now - bucket.updated >= refill_time]
+        for key in idle:
+            del self.buckets[key]
+
+        # Everyone is active: drop the oldest half rather than grow unbounded
+        if len(self.buckets) >= self.max_clients:
+            by_age = sorted(self.buckets, key=lambda key: self.buckets[key].updated)
+            for key in by_age[:len(by_age) // 2]:
+                del self.buckets[key]
+
+class AdmissionController:
+    """Rate limiting, concurrency limiting and shed-request accounting"""
+
+    def __init__(self):
+        self.rate_limiter = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS)
+        self.slots = {name: threading.BoundedSemaphore(limit) for name, limit in CONCURRENCY_LIMITS.items()}
+        self.in_flight = {name: 0 for name in CONCURRENCY_LIMITS}
+        self.admitted = {name: 0 for name in CONCURRENCY_LIMITS}
+        self.shed = {'rate_limited': 0, 'concurrency': 0, 'db_pool': 0}
+        self.lock = threading.Lock()
+
+    def count_shed(self, reason):
+        with self.lock:
+            self.shed[reason] += 1
+
+    def acquire(self, route_class):
+        """Take a concurrency slot for `route_class`, waiting at most ADMISSION_WAIT_TIMEOUT"""
+        if not self.slots[route_class].acquire(timeout=ADMISSION_WAIT_TIMEOUT):
+            return False
+        with self.lock:
+            self.in_flight[route_class] += 1
+            self.admitted[route_class] += 1
+        return True
+
+    def release(self, route_class):
+        with self.lock:
+            self.in_flight[route_class] -= 1
+        self.slots[route_class].release()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "in_flight": dict(self.in_flight),
+                "admitted": dict(self.admitted),
+                "shed": dict(self.shed),
+                "limits": dict(CONCURRENCY_LIMITS),
+            }
+
+# Global admission controller instance
+_admission_controller = None
+
+def get_admission_controller():
+    """Get or create admission controller instance"""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
+
+def get_client_id():
+    """Identify the client by its address (resolved through ProxyFix when TRUSTED_PROXY_HOPS is set)"""
+    return request.remote_addr or 'unknown'
+
+def get_route_class():
+    """Classify the current request as read, write or bulk (None if exempt)"""
+    if request.endpoint is None or request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+    if request.method == 'OPTIONS':
+        return None
+    if request.endpoint in BULK_ENDPOINTS:
+        return 'bulk'
+    if request.method in ('GET', 'HEAD'):
+        return 'read'
+    return 'write'
+
+def overloaded_response(status, message, retry_after):
+    """Error response telling the client when to retry"""
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def release_admission_slot():
+    """
+    Give up the current request's concurrency slot early, e.g. while it waits
+    on another request
+
+    Returns:
+        str: the released route class, or None if the request held no slot
+    """
+    route_class = g.pop('admission_class', None)
+    if route_class is not None:
+        get_admission_controller().release(route_class)
+    return route_class
+
+def reacquire_admission_slot(route_class):
+    """Take back a slot given up with release_admission_slot(); False if shed"""
+    controller = get_admission_controller()
+    if not controller.acquire(route_class):
+        controller.count_shed('concurrency')
+        return False
+    g.admission_class = route_class
+    return True
+
+def init_admission_control(app):
+    """Register admission control hooks on the Flask app"""
+    controller = get_admission_controller()
+
+    # Only trust X-Forwarded-For entries appended by our own proxies
+    if TRUSTED_PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+    @app.before_request
+    def admit_request():
+        route_class = get_route_class()
+        if route_class is None:
+            return None
+
+        retry_after = controller.rate_limiter.check(get_client_id())
+        if retry_after:
+            controller.count_shed('rate_limited')
+            return overloaded_response(429, "Too many requests", retry_after)
+
+        if not controller.acquire(route_class):
+            controller.count_shed('concurrency')
+            logger.warning(f"Shedding {request.method} {request.path}: {route_class} concurrency limit reached")
+            return overloaded_response(503, "Service overloaded", OVERLOAD_RETRY_AFTER)
+
+        g.admission_class = route_class
+        return None
+
+    @app.teardown_request
+    def release_request(exc):
+        route_class = g.pop('admission_class', None)
+        if route_class is not None:
+            controller.release(route_class)
+
+    @app.errorhandler(DatabasePoolTimeout)
+    def database_busy(error):
+        controller.count_shed('db_pool')
+        logger.warning(f"Shedding {request.method} {request.path}: {error}")
+        return overloaded_response(503, "Database busy", OVERLOAD_RETRY_AFTER)
+
+    logger.info(f"✓ Admission control enabled: {RATE_LIMIT_PER_SECOND}/s per client, limits {CONCURRENCY_LIMITS}")
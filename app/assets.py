@@ -0,0 +1,147 @@
+import hashlib
+import mimetypes
+import os
+import logging
+import threading
+from flask import Response, current_app, render_template, request, url_for
+from app.compression import (
+    COMPRESS_MIN_SIZE, COMPRESSIBLE_MIMETYPES, compress, negotiate_encoding, set_encoded_body,
+    supported_encodings
+)
+
+logger = logging.getLogger(__name__)
+
+# Fingerprinted assets never change under the same URL
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+class AssetManifest:
+    """Content hashes of the files in the static folder, plus precompressed copies"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.hashes = {}
+        self.mimetypes = {}
+        self.encoded = {}
+        self.scan()
+
+    def scan(self):
+        hashes, types, encoded = {}, {}, {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+                hashes[filename] = hashlib.sha256(data).hexdigest()[:12]
+
+                # Static files are streamed by Flask and bypass response compression,
+                # so compress them once here instead
+                mimetype = mimetypes.guess_type(filename)[0]
+                if mimetype in COMPRESSIBLE_MIMETYPES and len(data) >= COMPRESS_MIN_SIZE:
+                    types[filename] = mimetype
+                    encoded[filename] = {encoding: compress(data, encoding) for encoding in supported_encodings()}
+        self.hashes, self.mimetypes, self.encoded = hashes, types, encoded
+
+    def fingerprint(self, filename):
+        return self.hashes.get(filename)
+
+    def compressed_response(self, filename):
+        """Precompressed response for `filename`, or None to let Flask serve the file"""
+        variants = self.encoded.get(filename)
+        if variants is None:
+            return None
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return None
+
+        response = Response(mimetype=self.mimetypes[filename])
+        set_encoded_body(response, variants[encoding], encoding)
+        response.set_etag(f"{self.hashes[filename]}-{encoding}")
+        return response.make_conditional(request)
+
+class CachedPage:
+    """A rendered template kept in memory together with its compressed variants"""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.encoded = {}
+        self.lock = threading.Lock()
+
+    def encode(self, encoding):
+        body = self.encoded.get(encoding)
+        if body is None:
+            with self.lock:
+                body = self.encoded.get(encoding)
+                if body is None:
+                    body = self.encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def response(self):
+        response = Response(self.body, mimetype='text/html')
+        response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+
+        encoding = negotiate_encoding() if len(self.body) >= COMPRESS_MIN_SIZE else None
+        if encoding is None:
+            response.set_etag(self.etag)
+        else:
+            set_encoded_body(response, self.encode(encoding), encoding)
+            response.set_etag(f"{self.etag}-{encoding}")
+        return response.make_conditional(request)
+
+_pages = {}
+_pages_lock = threading.Lock()
+
+def render_cached_page(template_name, **context):
+    """Render a template once per process (every time in debug mode) and serve it from memory"""
+    if current_app.debug:
+        return CachedPage(render_template(template_name, **context).encode()).response()
+
+    page = _pages.get(template_name)
+    if page is None:
+        with _pages_lock:
+            page = _pages.get(template_name)
+            if page is None:
+                page = _pages[template_name] = CachedPage(render_template(template_name, **context).encode())
+                logger.info(f"Cached rendered template {template_name} ({len(page.body)} bytes)")
+    return page.response()
+
+def init_assets(app):
+    """Register fingerprinted static asset URLs and their cache headers"""
+    manifest = AssetManifest(app.static_folder)
+
+    @app.context_processor
+    def asset_helpers():
+        def asset_url(filename):
+            if app.debug:
+                manifest.scan()
+            return url_for('static', filename=filename, v=manifest.fingerprint(filename))
+        return {'asset_url': asset_url}
+
+    @app.before_request
+    def serve_compressed_asset():
+        if request.endpoint != 'static':
+            return None
+        return manifest.compressed_response(request.view_args.get('filename'))
+
+    @app.after_request
+    def set_asset_cache_headers(response):
+        if request.endpoint != 'static' or response.status_code not in (200, 304):
+            return response
+
+        filename = request.view_args.get('filename')
+        # Assets with precompressed variants differ by Accept-Encoding even when
+        # Flask serves the plain file
+        if filename in manifest.encoded:
+            response.vary.add('Accept-Encoding')
+
+        version = request.args.get('v')
+        if version and version == manifest.fingerprint(filename):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response
+
+    logger.info(f"✓ Fingerprinted {len(manifest.hashes)} static assets ({len(manifest.encoded)} precompressed)")
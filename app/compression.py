@@ -0,0 +1,73 @@
+import gzip
+import os
+import logging
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+# Brotli's top qualities are far too slow for per-request use
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'application/javascript',
+}
+
+def supported_encodings():
+    """Encodings this worker can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def negotiate_encoding():
+    """Pick the best encoding accepted by the client, or None"""
+    return request.accept_encodings.best_match(supported_encodings())
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+
+def set_encoded_body(response, body, encoding):
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+
+def should_compress(response):
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+        and response.content_length is not None
+        and response.content_length >= COMPRESS_MIN_SIZE
+    )
+
+def init_compression(app):
+    """Register response compression on the Flask app"""
+
+    @app.after_request
+    def compress_response(response):
+        if not should_compress(response):
+            return response
+
+        # The representation depends on Accept-Encoding even if we send it as-is
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+
+        set_encoded_body(response, compress(response.get_data(), encoding), encoding)
+        return response
+
+    logger.info(f"✓ Response compression enabled: {', '.join(supported_encodings())} above {COMPRESS_MIN_SIZE} bytes")
@@ -1,38 +1,133 @@
 import os
+import logging
+import threading
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from app.tracing import span, current_trace_id
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-def create_db_connection():
+# Connection pool configuration
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 2))
+# Queries slower than this are logged (with parameters redacted)
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+
+class DatabasePoolTimeout(Exception):
+    """Raised when no pooled connection becomes available within DB_POOL_TIMEOUT"""
+
+    def __init__(self, timeout):
+        super().__init__(f"Timed out after {timeout}s waiting for a database connection")
+        self.timeout = timeout
+
+_pool = None
+_pool_lock = threading.Lock()
+# Bounds checkouts to the pool size so callers wait (with a timeout) instead of
+# getting a PoolError or piling up new connections
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+def get_db_pool():
+    """Get or create the connection pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL)
+    return _pool
+
+def create_db_connection(timeout=None):
+    """Check a connection out of the pool, waiting at most `timeout` seconds"""
+    timeout = DB_POOL_TIMEOUT if timeout is None else timeout
+    with span('db.acquire'):
+        if not _pool_slots.acquire(timeout=timeout):
+            raise DatabasePoolTimeout(timeout)
+
+        try:
+            pool = get_db_pool()
+            conn = pool.getconn()
+            # Replace connections the server already closed on us
+            if conn.closed:
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            return conn
+        except Exception as e:
+            _pool_slots.release()
+            print(f"Database connection error: {e}")
+            return None
+
+def release_db_connection(conn):
+    """Return a connection to the pool, discarding it if it is broken"""
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    except Exception as e:
-        print(f"Database connection error: {e}")
-        return None
+        get_db_pool().putconn(conn, close=bool(conn.closed))
+    finally:
+        _pool_slots.release()
 
-def query_db(query, args=(), one=False, commit=False):
-    conn = create_db_connection()
-    if not conn:
-        return None
-    
+def redact_params(args):
+    """Describe query parameters by type only, so values never reach the logs"""
+    if isinstance(args, dict):
+        return {key: type(value).__name__ for key, value in args.items()}
+    return tuple(type(value).__name__ for value in args)
+
+def log_slow_query(query, args, duration_ms):
+    if duration_ms >= SLOW_QUERY_MS:
+        logger.warning(
+            f"Slow query ({duration_ms:.1f}ms, trace {current_trace_id()}): "
+            f"{' '.join(query.split())} params={redact_params(args)}"
+        )
+
+def rollback_quietly(conn):
+    """Roll back, ignoring errors from connections that are already broken"""
+    if conn.closed:
+        return
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(query, args)
-        
-        if commit:
-            conn.commit()
-        
-        if "SELECT" in query.upper():
-            rv = cur.fetchone() if one else cur.fetchall()
-        else:
-            rv = cur.rowcount
-        
-        cur.close()
-        return rv
-    except Exception as e:
         conn.rollback()
-        raise Exception(f"Database error: {str(e)}")
-    finally:
-        conn.close()
\ No newline at end of file
+    except psycopg2.Error as e:
+        logger.warning(f"Rollback failed: {e}")
+
+def query_db(query, args=(), one=False, commit=False):
+    # A pooled connection may have been dropped by the server (restart, idle
+    # timeout); that only shows up on first use, so retry once on a new one
+    for attempt in range(2):
+        conn = create_db_connection()
+        if not conn:
+            return None
+
+        executed = False
+        try:
+            with span('db.query') as query_span:
+                cur = conn.cursor(cursor_factory=RealDictCursor)
+                cur.execute(query, args)
+                executed = True
+
+                if commit:
+                    conn.commit()
+
+                # description is set for SELECT and for INSERT/UPDATE/DELETE ... RETURNING
+                if cur.description is not None:
+                    rv = cur.fetchone() if one else cur.fetchall()
+                else:
+                    rv = cur.rowcount
+            log_slow_query(query, args, query_span.duration_ms)
+
+            cur.close()
+            return rv
+        except psycopg2.IntegrityError:
+            # Constraint violations are surfaced as-is so callers can map them
+            rollback_quietly(conn)
+            raise
+        except psycopg2.OperationalError as e:
+            rollback_quietly(conn)
+            # Nothing was committed if execute() itself failed, so a retry is safe
+            if conn.closed and not executed and attempt == 0:
+                logger.warning(f"Discarding stale database connection: {e}")
+                continue
+            raise Exception(f"Database error: {str(e)}")
+        except Exception as e:
+            rollback_quietly(conn)
+            raise Exception(f"Database error: {str(e)}")
+        finally:
+            release_db_connection(conn)
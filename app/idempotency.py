@@ -0,0 +1,209 @@
+import hashlib
+import os
+import logging
+import threading
+import time
+import uuid
+from functools import wraps
+import psycopg2
+from flask import Response, jsonify, make_response, request
+from app.db import query_db, DatabasePoolTimeout
+from app.admission import (
+    OVERLOAD_RETRY_AFTER, overloaded_response, release_admission_slot, reacquire_admission_slot
+)
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', 24 * 60 * 60))
+# In-flight claims expire after this long, so a crashed worker cannot block a key
+IDEMPOTENCY_LEASE = float(os.getenv('IDEMPOTENCY_LEASE', 30))
+# How long a duplicate waits for the original request to finish
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', 2))
+IDEMPOTENCY_POLL_INTERVAL = 0.02
+IDEMPOTENCY_MAX_POLL_INTERVAL = 0.2
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv('IDEMPOTENCY_PURGE_INTERVAL', 300))
+MAX_KEY_LENGTH = 255
+
+class IdempotencyRecord:
+    """Stored state of a request made with an idempotency key"""
+
+    def __init__(self, fingerprint, status_code=None, body=None, mimetype=None):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.body = body
+        self.mimetype = mimetype
+
+    @property
+    def completed(self):
+        return self.status_code is not None
+
+    def replay(self):
+        response = Response(self.body, status=self.status_code, mimetype=self.mimetype)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+class IdempotencyStore:
+    """Idempotency keys kept in Postgres, so every worker and replica sees the same claims"""
+
+    def __init__(self, ttl, lease):
+        self.ttl = ttl
+        self.lease = lease
+        self.next_purge = 0
+        self.purge_lock = threading.Lock()
+
+    def claim(self, key, fingerprint):
+        """
+        Claim `key` for a new request, taking over claims whose lease or TTL expired
+
+        Returns:
+            str: owner token to pass to complete()/release(), or None if the key is taken
+        """
+        self._maybe_purge()
+        token = uuid.uuid4().hex
+        row = query_db(
+            "INSERT INTO idempotency_keys (key, fingerprint, owner, expires_at) "
+            "VALUES (%s, %s, %s, now() + %s * interval '1 second') "
+            "ON CONFLICT (key) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, owner = EXCLUDED.owner, "
+            "status_code = NULL, body = NULL, mimetype = NULL, expires_at = EXCLUDED.expires_at "
+            "WHERE idempotency_keys.expires_at <= now() "
+            "RETURNING owner",
+            (key, fingerprint, token, self.lease),
+            one=True,
+            commit=True
+        )
+        return token if row else None
+
+    def get(self, key):
+        """The live record for `key`, or None if it is unclaimed or expired"""
+        row = query_db(
+            "SELECT fingerprint, status_code, body, mimetype FROM idempotency_keys "
+            "WHERE key = %s AND expires_at > now()",
+            (key,),
+            one=True
+        )
+        if row is None:
+            return None
+        body = bytes(row['body']) if row['body'] is not None else None
+        return IdempotencyRecord(row['fingerprint'], row['status_code'], body, row['mimetype'])
+
+    def complete(self, key, token, response):
+        """Record the response so retries can replay it until the TTL expires"""
+        query_db(
+            "UPDATE idempotency_keys SET status_code = %s, body = %s, mimetype = %s, "
+            "expires_at = now() + %s * interval '1 second' WHERE key = %s AND owner = %s",
+            (response.status_code, psycopg2.Binary(response.get_data()), response.mimetype,
+             self.ttl, key, token),
+            commit=True
+        )
+
+    def release(self, key, token):
+        """Forget our claim so the request can be retried"""
+        query_db("DELETE FROM idempotency_keys WHERE key = %s AND owner = %s", (key, token), commit=True)
+
+    def _maybe_purge(self):
+        """Delete expired keys at most once per IDEMPOTENCY_PURGE_INTERVAL per worker"""
+        now = time.monotonic()
+        if now < self.next_purge or not self.purge_lock.acquire(blocking=False):
+            return
+        try:
+            self.next_purge = now + IDEMPOTENCY_PURGE_INTERVAL
+            query_db("DELETE FROM idempotency_keys WHERE expires_at <= now()", commit=True)
+        except Exception as e:
+            logger.warning(f"Failed to purge expired idempotency keys: {e}")
+        finally:
+            self.purge_lock.release()
+
+# Global idempotency store instance
+_idempotency_store = None
+
+def get_idempotency_store():
+    """Get or create idempotency store instance"""
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore(IDEMPOTENCY_TTL, IDEMPOTENCY_LEASE)
+    return _idempotency_store
+
+def finish_request(store, key, token, response):
+    """Store the response, or release the key if the request should be retryable"""
+    try:
+        if response is None or response.status_code >= 500:
+            store.release(key, token)
+        else:
+            store.complete(key, token, response)
+    except Exception as e:
+        # The claim stays in flight until its lease expires
+        logger.error(f"Failed to record idempotency key {key}: {e}")
+
+def request_fingerprint():
+    """Hash of the parts of the request that must match for a replay"""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def idempotent(view):
+    """Honor the Idempotency-Key header on a write endpoint"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        store = get_idempotency_store()
+        scoped_key = f"{request.method} {request.path} {key}"
+        fingerprint = request_fingerprint()
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_TIMEOUT
+        poll_interval = IDEMPOTENCY_POLL_INTERVAL
+        released = False
+        released_class = None
+
+        try:
+            token = store.claim(scoped_key, fingerprint)
+            while token is None:
+                record = store.get(scoped_key)
+                if record is None:
+                    # The original failed or expired meanwhile; try to take over the key
+                    token = store.claim(scoped_key, fingerprint)
+                    continue
+
+                if record.fingerprint != fingerprint:
+                    return jsonify({"error": f"{IDEMPOTENCY_HEADER} was already used with a different request"}), 422
+                if record.completed:
+                    logger.info(f"Replaying response for idempotency key {key}")
+                    return record.replay()
+
+                # A concurrent duplicate, possibly on another replica: wait for the
+                # original without holding a concurrency slot other writers could use
+                if not released:
+                    released_class = release_admission_slot()
+                    released = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return overloaded_response(
+                        409, "A request with this idempotency key is still in progress", OVERLOAD_RETRY_AFTER
+                    )
+                time.sleep(min(poll_interval, remaining))
+                poll_interval = min(poll_interval * 2, IDEMPOTENCY_MAX_POLL_INTERVAL)
+        except DatabasePoolTimeout:
+            raise
+        except Exception as e:
+            # Running the request without its key could execute it twice
+            logger.error(f"Idempotency store unavailable: {e}")
+            return overloaded_response(503, "Idempotency store unavailable", OVERLOAD_RETRY_AFTER)
+
+        if released_class is not None and not reacquire_admission_slot(released_class):
+            finish_request(store, scoped_key, token, None)
+            return overloaded_response(503, "Service overloaded", OVERLOAD_RETRY_AFTER)
+
+        response = None
+        try:
+            response = make_response(view(*args, **kwargs))
+            return response
+        finally:
+            finish_request(store, scoped_key, token, response)
+
+    return wrapper
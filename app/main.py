@@ -1,13 +1,22 @@
 import json
+import math
 import os
 import logging
 import sys
 import time
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from app.services.user_service import UserService
+from app.services.user_service import UserService, UserAlreadyExists
 from app.services.rabbitmq_service import init_rabbitmq, get_rabbitmq_service
 from app.services.rabbitmq_consumer import start_rabbitmq_consumer
+from app.services.stats_service import StatsService, start_stats_reconciler
+from app.admission import init_admission_control, get_admission_controller
+from app.db import DatabasePoolTimeout
+from app.idempotency import idempotent
+from app.tracing import init_tracing
+from app.compression import init_compression
+from app.assets import init_assets, render_cached_page
+from app.profiler import admin_required, get_profiler, PROFILE_MAX_SECONDS, PROFILE_MIN_INTERVAL
 
 # Configure logging FIRST
 logging.basicConfig(
@@ -19,8 +28,15 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__, template_folder='templates')
 CORS(app)
+# Tracing first so its hooks wrap admission control
+init_tracing(app)
+init_admission_control(app)
+init_compression(app)
+init_assets(app)
 
 user_service = UserService()
+# Upper bound for the signups window of /api/users/stats
+MAX_STATS_DAYS = 3650
 rabbitmq_service = None
 rabbitmq_connected = False
 
@@ -55,7 +71,7 @@ def publish_message(event_type, user_data):
 @app.route('/')
 def index():
     """Render index page"""
-    return render_template('index.html')
+    return render_cached_page('index.html')
 
 @app.route('/api/health', methods=['GET'])
 def health():
@@ -63,19 +79,43 @@ def health():
     return jsonify({
         "status": "healthy",
         "message": "Service is running!",
-        "rabbitmq_status": "connected" if rabbitmq_connected else "disconnected"
+        "rabbitmq_status": "connected" if rabbitmq_connected else "disconnected",
+        "admission": get_admission_controller().get_stats()
     }), 200
 
 @app.route('/api/users', methods=['GET'])
 def get_users():
-    """Get all users"""
+    """Get all users, optionally paginated with limit/offset"""
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if (limit is not None and limit < 0) or offset < 0:
+        return jsonify({"error": "limit and offset must be non-negative integers"}), 400
+
     try:
-        users = user_service.get_all_users()
+        users = user_service.get_all_users(limit, offset)
         return jsonify(users), 200
+    except DatabasePoolTimeout:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving users: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/users/stats', methods=['GET'])
+def get_user_stats():
+    """Get user totals, users per role and signups per day"""
+    days = request.args.get('days', 30, type=int)
+    if days <= 0 or days > MAX_STATS_DAYS:
+        return jsonify({"error": f"days must be an integer between 1 and {MAX_STATS_DAYS}"}), 400
+
+    try:
+        stats = StatsService.get_user_stats(days)
+        return jsonify(stats), 200
+    except DatabasePoolTimeout:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving user stats: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Get user by ID"""
@@ -84,11 +124,14 @@ def get_user(user_id):
         if user:
             return jsonify(user), 200
         return jsonify({"error": "User not found"}), 404
+    except DatabasePoolTimeout:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving user: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/users', methods=['POST'])
+@idempotent
 def create_user():
     """Create a new user"""
     try:
@@ -117,11 +160,16 @@ def create_user():
             "user": new_user
         }), 201
 
+    except UserAlreadyExists as e:
+        return jsonify({"error": str(e)}), 409
+    except DatabasePoolTimeout:
+        raise
     except Exception as e:
         logger.error(f"Error in create_user: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
+@idempotent
 def update_user(user_id):
     """Update a user"""
     try:
@@ -142,23 +190,23 @@ def update_user(user_id):
             "user": updated_user
         }), 200
 
+    except UserAlreadyExists as e:
+        return jsonify({"error": str(e)}), 409
+    except DatabasePoolTimeout:
+        raise
     except Exception as e:
         logger.error(f"Error in update_user: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/users/<int:user_id>', methods=['DELETE'])
+@idempotent
 def delete_user(user_id):
     """Delete a user"""
     try:
-        # Get user before deletion
-        user = user_service.get_user_by_id(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
         # Delete user
         deleted_user = user_service.delete_user(user_id)
         if not deleted_user:
-            return jsonify({"error": "Failed to delete user"}), 500
+            return jsonify({"error": "User not found"}), 404
 
         # Publish message (non-blocking)
         publish_message('user_deleted', deleted_user)
@@ -168,10 +216,39 @@ def delete_user(user_id):
             "user": deleted_user
         }), 200
 
+    except DatabasePoolTimeout:
+        raise
     except Exception as e:
         logger.error(f"Error in delete_user: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/admin/profile', methods=['GET'])
+@admin_required
+def profile():
+    """Sample all worker threads and return folded stacks for a flame graph"""
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval', 0.005))
+    except ValueError:
+        return jsonify({"error": "seconds and interval must be numbers"}), 400
+    if not (math.isfinite(seconds) and math.isfinite(interval)) or seconds <= 0 or interval <= 0:
+        return jsonify({"error": "seconds and interval must be positive numbers"}), 400
+
+    seconds = min(seconds, PROFILE_MAX_SECONDS)
+    interval = min(max(interval, PROFILE_MIN_INTERVAL), seconds)
+
+    logger.info(f"Profiling for {seconds}s at {interval}s interval")
+    stacks = get_profiler().profile(seconds, interval)
+    if stacks is None:
+        return jsonify({"error": "A profile is already running"}), 409
+
+    folded = '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common())
+    return Response(
+        folded + '\n',
+        mimetype='text/plain',
+        headers={'Content-Disposition': 'attachment; filename=profile.folded'}
+    )
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
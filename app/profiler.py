@@ -0,0 +1,84 @@
+import hmac
+import os
+import sys
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from flask import jsonify, request
+
+logger = logging.getLogger(__name__)
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))
+PROFILE_MIN_INTERVAL = 0.001
+
+def admin_required(view):
+    """Require the X-Admin-Token header to match ADMIN_TOKEN (disabled if unset)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Admin endpoints are disabled"}), 403
+
+        token = request.headers.get(ADMIN_TOKEN_HEADER, '')
+        if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        return view(*args, **kwargs)
+    return wrapper
+
+class SamplingProfiler:
+    """Samples the stacks of all live threads and folds them for flame graphs"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def profile(self, duration, interval):
+        """
+        Sample every other thread for `duration` seconds
+
+        Returns:
+            Counter: folded stack -> sample count, or None if a profile is already running
+        """
+        if not self.lock.acquire(blocking=False):
+            return None
+
+        try:
+            own_thread = threading.get_ident()
+            stacks = Counter()
+            deadline = time.monotonic() + duration
+
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stacks[self.fold(names.get(thread_id, str(thread_id)), frame)] += 1
+                time.sleep(interval)
+
+            return stacks
+        finally:
+            self.lock.release()
+
+    @staticmethod
+    def fold(thread_name, frame):
+        """Render a stack in the collapsed format used by flamegraph.pl and speedscope"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.append(thread_name)
+        return ';'.join(reversed(names))
+
+# Global profiler instance
+_profiler = None
+
+def get_profiler():
+    """Get or create profiler instance"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
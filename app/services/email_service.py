@@ -3,6 +3,7 @@ import logging
 from mailersend import MailerSendClient
 from mailersend import EmailBuilder
 from mailersend.exceptions import MailerSendError
+from app.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -63,7 +64,8 @@ class EmailService:
                 email = email.html(html_body)
             
             # Send email
-            response = self.client.emails.send(email.build())
+            with span('email.send'):
+                response = self.client.emails.send(email.build())
             
             logger.info(f"Email sent successfully to {recipient_email}")
             return True
@@ -106,7 +108,8 @@ class EmailService:
                 for key, value in variables.items():
                     email = email.personalization(recipient_email, {key: value})
             
-            response = self.client.emails.send(email.build())
+            with span('email.send'):
+                response = self.client.emails.send(email.build())
             
             logger.info(f"Template email sent successfully to {recipient_email}")
             return True
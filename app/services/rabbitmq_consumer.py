@@ -3,13 +3,22 @@ import logging
 from threading import Thread
 from app.services.rabbitmq_service import get_rabbitmq_service
 from app.services.email_service import send_email
+from app.tracing import TRACE_ID_PATTERN, span, start_trace, end_trace
 
 logger = logging.getLogger(__name__)
 
 def handle_message(ch, method, properties, body):
     """Callback function to handle RabbitMQ messages"""
+    # Continue the trace started by the HTTP request that published the event
+    headers = properties.headers or {}
+    trace_id = headers.get('trace_id')
+    if not isinstance(trace_id, str) or not TRACE_ID_PATTERN.fullmatch(trace_id):
+        trace_id = None
+    trace, token = start_trace(f"consume {method.routing_key}", trace_id)
+    
     try:
-        message = json.loads(body)
+        with span('decode'):
+            message = json.loads(body)
         event_type = message.get('event_type')
         user_data = message.get('user_data', {})
         
@@ -24,7 +33,8 @@ def handle_message(ch, method, properties, body):
             handle_user_deleted(user_data)
         
         # Acknowledge message
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        with span('ack'):
+            ch.basic_ack(delivery_tag=method.delivery_tag)
         logger.info(f"Acknowledged message: {event_type}")
         
     except json.JSONDecodeError as e:
@@ -33,6 +43,8 @@ def handle_message(ch, method, properties, body):
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+    finally:
+        end_trace(trace, token)
 
 def handle_user_created(user_data):
     """Handle user creation event"""
@@ -42,26 +54,27 @@ def handle_user_created(user_data):
         
         logger.info(f"Processing user creation for {email}")
         
-        subject = "Welcome to Our Platform"
-        html_body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="max-width: 600px; margin: 0 auto;">
-                    <h1 style="color: #333;">Welcome, {name}!</h1>
-                    <p>Thank you for creating an account on our platform.</p>
-                    <p>Your account has been successfully set up and is ready to use.</p>
-                    <p>If you have any questions, feel free to contact our support team.</p>
-                    <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
-                    <p style="color: #666; font-size: 12px;">
-                        Best regards,<br>
-                        User Management System Team
-                    </p>
-                </div>
-            </body>
-        </html>
-        """
-        
-        text_body = f"Hello {name},\n\nWelcome! Your account has been created successfully."
+        with span('render'):
+            subject = "Welcome to Our Platform"
+            html_body = f"""
+            <html>
+                <body style="font-family: Arial, sans-serif;">
+                    <div style="max-width: 600px; margin: 0 auto;">
+                        <h1 style="color: #333;">Welcome, {name}!</h1>
+                        <p>Thank you for creating an account on our platform.</p>
+                        <p>Your account has been successfully set up and is ready to use.</p>
+                        <p>If you have any questions, feel free to contact our support team.</p>
+                        <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
+                        <p style="color: #666; font-size: 12px;">
+                            Best regards,<br>
+                            User Management System Team
+                        </p>
+                    </div>
+                </body>
+            </html>
+            """
+        
+            text_body = f"Hello {name},\n\nWelcome! Your account has been created successfully."
         
         send_email(email, subject, text_body, html_body=html_body)
         logger.info(f"Welcome email sent to {email}")
@@ -77,26 +90,27 @@ def handle_user_updated(user_data):
         
         logger.info(f"Processing user update for {email}")
         
-        subject = "Account Updated"
-        html_body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="max-width: 600px; margin: 0 auto;">
-                    <h1 style="color: #333;">Account Updated</h1>
-                    <p>Hello {name},</p>
-                    <p>Your account information has been successfully updated.</p>
-                    <p>If you did not make this change, please contact our support team immediately.</p>
-                    <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
-                    <p style="color: #666; font-size: 12px;">
-                        Best regards,<br>
-                        User Management System Team
-                    </p>
-                </div>
-            </body>
-        </html>
-        """
-        
-        text_body = f"Hello {name},\n\nYour account has been updated successfully."
+        with span('render'):
+            subject = "Account Updated"
+            html_body = f"""
+            <html>
+                <body style="font-family: Arial, sans-serif;">
+                    <div style="max-width: 600px; margin: 0 auto;">
+                        <h1 style="color: #333;">Account Updated</h1>
+                        <p>Hello {name},</p>
+                        <p>Your account information has been successfully updated.</p>
+                        <p>If you did not make this change, please contact our support team immediately.</p>
+                        <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
+                        <p style="color: #666; font-size: 12px;">
+                            Best regards,<br>
+                            User Management System Team
+                        </p>
+                    </div>
+                </body>
+            </html>
+            """
+        
+            text_body = f"Hello {name},\n\nYour account has been updated successfully."
         
         send_email(email, subject, text_body, html_body=html_body)
         logger.info(f"Update notification sent to {email}")
@@ -112,27 +126,28 @@ def handle_user_deleted(user_data):
         
         logger.info(f"Processing user deletion for {email}")
         
-        subject = "Account Deleted"
-        html_body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="max-width: 600px; margin: 0 auto;">
-                    <h1 style="color: #d32f2f;">Account Deleted</h1>
-                    <p>Hello {name},</p>
-                    <p>We wanted to confirm that your account has been successfully deleted from our platform.</p>
-                    <p>All your data has been removed from our systems.</p>
-                    <p>If you have any questions or would like to reactivate your account, please contact our support team.</p>
-                    <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
-                    <p style="color: #666; font-size: 12px;">
-                        Best regards,<br>
-                        User Management System Team
-                    </p>
-                </div>
-            </body>
-        </html>
-        """
-        
-        text_body = f"Hello {name},\n\nYour account has been deleted. If this was not intentional, please contact support."
+        with span('render'):
+            subject = "Account Deleted"
+            html_body = f"""
+            <html>
+                <body style="font-family: Arial, sans-serif;">
+                    <div style="max-width: 600px; margin: 0 auto;">
+                        <h1 style="color: #d32f2f;">Account Deleted</h1>
+                        <p>Hello {name},</p>
+                        <p>We wanted to confirm that your account has been successfully deleted from our platform.</p>
+                        <p>All your data has been removed from our systems.</p>
+                        <p>If you have any questions or would like to reactivate your account, please contact our support team.</p>
+                        <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
+                        <p style="color: #666; font-size: 12px;">
+                            Best regards,<br>
+                            User Management System Team
+                        </p>
+                    </div>
+                </body>
+            </html>
+            """
+        
+            text_body = f"Hello {name},\n\nYour account has been deleted. If this was not intentional, please contact support."
         
         send_email(email, subject, text_body, html_body=html_body)
         logger.info(f"Deletion notification sent to {email}")
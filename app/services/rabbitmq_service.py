@@ -3,6 +3,7 @@ import json
 import os
 import logging
 from pika.exceptions import AMQPConnectionError
+from app.tracing import span, current_trace_id
 
 logger = logging.getLogger(__name__)
 
@@ -89,15 +90,23 @@ class RabbitMQService:
             
             routing_key = f'user.{event_type}'
             
-            self.channel.basic_publish(
-                exchange=self.exchange_name,
-                routing_key=routing_key,
-                body=json.dumps(message, default=str),
-                properties=pika.BasicProperties(
-                    delivery_mode=pika.spec.PERSISTENT_DELIVERY_MODE,
-                    content_type='application/json'
+            # Propagate the trace id so the consumer's spans can be correlated
+            headers = {}
+            trace_id = current_trace_id()
+            if trace_id:
+                headers['trace_id'] = trace_id
+            
+            with span('broker.publish'):
+                self.channel.basic_publish(
+                    exchange=self.exchange_name,
+                    routing_key=routing_key,
+                    body=json.dumps(message, default=str),
+                    properties=pika.BasicProperties(
+                        delivery_mode=pika.spec.PERSISTENT_DELIVERY_MODE,
+                        content_type='application/json',
+                        headers=headers
+                    )
                 )
-            )
             
             logger.info(f"Published {event_type} event for user {user_data.get('id')}")
             return True
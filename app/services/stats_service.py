@@ -0,0 +1,87 @@
+import os
+import logging
+import time
+from threading import Thread
+from app.db import query_db, DatabasePoolTimeout
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reconciliations of the summary tables (0 disables the job)
+STATS_RECONCILE_INTERVAL = int(os.getenv('STATS_RECONCILE_INTERVAL', 3600))
+
+class StatsService:
+    """User statistics served from the trigger-maintained summary tables"""
+
+    @staticmethod
+    def get_total_users():
+        try:
+            row = query_db(
+                "SELECT COALESCE(SUM(user_count), 0)::bigint AS total FROM user_role_counts",
+                one=True
+            )
+            return row['total'] if row else None
+        except DatabasePoolTimeout:
+            raise
+        except Exception as e:
+            logger.warning(f"User stats summary unavailable, has 02-create-user-stats.sql been applied? {e}")
+            return None
+
+    @staticmethod
+    def get_user_stats(days=30):
+        try:
+            roles = query_db(
+                "SELECT NULLIF(role, '') AS role, user_count AS count FROM user_role_counts "
+                "WHERE user_count > 0 ORDER BY user_count DESC, role"
+            ) or []
+            signups = query_db(
+                "SELECT to_char(day, 'YYYY-MM-DD') AS date, user_count AS count FROM user_signup_counts "
+                "WHERE user_count > 0 AND day > CURRENT_DATE - %s ORDER BY day",
+                (days,)
+            ) or []
+            return {
+                "total": sum(row['count'] for row in roles),
+                "roles": roles,
+                "signups": signups
+            }
+        except DatabasePoolTimeout:
+            raise
+        except Exception as e:
+            raise Exception(f"Error retrieving user stats: {str(e)}")
+
+    @staticmethod
+    def reconcile():
+        """Correct any drift between the summary tables and users"""
+        try:
+            started = time.perf_counter()
+            row = query_db("SELECT reconcile_user_stats() AS corrected", one=True, commit=True)
+            elapsed = (time.perf_counter() - started) * 1000
+
+            if row and row['corrected'] is not None:
+                logger.info(f"User stats reconciled in {elapsed:.1f}ms, {row['corrected']} rows corrected")
+                return True
+            logger.info("User stats reconciliation already running elsewhere, skipped")
+            return False
+        except Exception as e:
+            logger.error(f"Error reconciling user stats: {e}")
+            return False
+
+def run_stats_reconciler(interval):
+    """Periodically reconcile the summary tables"""
+    while True:
+        time.sleep(interval)
+        StatsService.reconcile()
+
+def start_stats_reconciler():
+    """Start stats reconciliation job in background thread"""
+    if STATS_RECONCILE_INTERVAL <= 0:
+        logger.info("Stats reconciliation disabled")
+        return False
+
+    reconciler_thread = Thread(
+        target=run_stats_reconciler,
+        args=(STATS_RECONCILE_INTERVAL,),
+        daemon=True
+    )
+    reconciler_thread.start()
+    logger.info(f"✓ Stats reconciler started (every {STATS_RECONCILE_INTERVAL}s)")
+    return True
@@ -1,11 +1,30 @@
-from app.db import query_db
+from psycopg2.errors import UniqueViolation
+from app.db import query_db, DatabasePoolTimeout
+from app.services.stats_service import StatsService
+
+class UserAlreadyExists(Exception):
+    """Raised when a user with the same email already exists"""
 
 class UserService:
+    # Columns that may be set through update_user
+    UPDATABLE_FIELDS = ('name', 'email', 'role')
+
     @staticmethod
-    def get_all_users():
+    def get_all_users(limit=None, offset=0):
         try:
-            users = query_db("SELECT * FROM users")
-            return {"users": users if users else [], "count": len(users) if users else 0}
+            if limit is None:
+                users = query_db("SELECT * FROM users ORDER BY id") or []
+            else:
+                users = query_db("SELECT * FROM users ORDER BY id LIMIT %s OFFSET %s", (limit, offset)) or []
+
+            # Total comes from the summary table; fall back to a scan if it is unavailable
+            count = StatsService.get_total_users()
+            if count is None:
+                row = query_db("SELECT COUNT(*) AS total FROM users", one=True)
+                count = row['total'] if row else len(users)
+            return {"users": users, "count": count}
+        except DatabasePoolTimeout:
+            raise
         except Exception as e:
             print(f"Error: {e}")
             return {"users": [], "count": 0}
@@ -14,6 +33,8 @@ class UserService:
     def get_user_by_id(user_id):
         try:
             return query_db("SELECT * FROM users WHERE id = %s", (user_id,), one=True)
+        except DatabasePoolTimeout:
+            raise
         except Exception as e:
             print(f"Error: {e}")
             return None
@@ -27,15 +48,39 @@ class UserService:
                 one=True,
                 commit=True
             )
+        except UniqueViolation:
+            raise UserAlreadyExists(f"User with email {data.get('email')} already exists")
+        except DatabasePoolTimeout:
+            raise
         except Exception as e:
             raise Exception(f"Error creating user: {str(e)}")
 
+    @staticmethod
+    def update_user(user_id, data):
+        fields = [field for field in UserService.UPDATABLE_FIELDS if field in data]
+        if not fields:
+            return UserService.get_user_by_id(user_id)
+
+        assignments = ', '.join(f"{field} = %s" for field in fields)
+        try:
+            return query_db(
+                f'UPDATE users SET {assignments} WHERE id = %s RETURNING *',
+                tuple(data[field] for field in fields) + (user_id,),
+                one=True,
+                commit=True
+            )
+        except UniqueViolation:
+            raise UserAlreadyExists(f"User with email {data.get('email')} already exists")
+        except DatabasePoolTimeout:
+            raise
+        except Exception as e:
+            raise Exception(f"Error updating user: {str(e)}")
+
     @staticmethod
     def delete_user(user_id):
         try:
-            user = UserService.get_user_by_id(user_id)
-            if user:
-                query_db("DELETE FROM users WHERE id = %s", (user_id,), commit=True)
-            return user
+            return query_db("DELETE FROM users WHERE id = %s RETURNING *", (user_id,), one=True, commit=True)
+        except DatabasePoolTimeout:
+            raise
         except Exception as e:
             raise Exception(f"Error deleting user: {str(e)}")
\ No newline at end of file
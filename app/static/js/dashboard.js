@@ -0,0 +1,123 @@
+let allUsers = [];
+
+window.onload = () => {
+    loadUsers();
+};
+
+async function loadUsers() {
+    try {
+        const response = await fetch('/api/users');
+        const data = await response.json();
+        allUsers = data.users || [];
+        displayUsers(allUsers);
+    } catch (error) {
+        document.getElementById('usersBody').innerHTML = 
+            '<tr><td colspan="5" class="no-results">Error loading users</td></tr>';
+    }
+}
+
+function displayUsers(users) {
+    const tbody = document.getElementById('usersBody');
+
+    if (users.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="5" class="no-results">No users found</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = users.map(user => `
+        <tr>
+            <td>${user.id}</td>
+            <td>${user.name}</td>
+            <td>${user.email}</td>
+            <td><span class="badge">${user.role}</span></td>
+            <td>
+                <button class="action-btn danger" onclick="deleteUser(${user.id})">Delete</button>
+            </td>
+        </tr>
+    `).join('');
+}
+
+document.getElementById('searchBar').addEventListener('input', (e) => {
+    const searchTerm = e.target.value.toLowerCase();
+    const filtered = allUsers.filter(user => 
+        user.name.toLowerCase().includes(searchTerm) ||
+        user.email.toLowerCase().includes(searchTerm) ||
+        user.role.toLowerCase().includes(searchTerm)
+    );
+    displayUsers(filtered);
+});
+
+function openAddModal() {
+    document.getElementById('addModal').style.display = 'block';
+}
+
+function closeAddModal() {
+    document.getElementById('addModal').style.display = 'none';
+    document.getElementById('newName').value = '';
+    document.getElementById('newEmail').value = '';
+    document.getElementById('newRole').value = '';
+}
+
+async function addUser() {
+    const name = document.getElementById('newName').value.trim();
+    const email = document.getElementById('newEmail').value.trim();
+    const role = document.getElementById('newRole').value.trim();
+
+    if (!name || !email || !role) {
+        alert('Please fill all fields');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/users', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ name, email, role })
+        });
+
+        if (response.ok) {
+            closeAddModal();
+            loadUsers();
+            alert('User added successfully!');
+        } else {
+            alert('Failed to add user');
+        }
+    } catch (error) {
+        alert('Error adding user');
+    }
+}
+
+async function deleteUser(userId) {
+    if (!confirm('Are you sure you want to delete this user?')) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/users/${userId}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            loadUsers();
+            alert('User deleted successfully!');
+        } else {
+            alert('Failed to delete user');
+        }
+    } catch (error) {
+        alert('Error deleting user');
+    }
+}
+
+function refreshUsers() {
+    document.getElementById('searchBar').value = '';
+    loadUsers();
+}
+
+window.onclick = function(event) {
+    const modal = document.getElementById('addModal');
+    if (event.target == modal) {
+        closeAddModal();
+    }
+}
@@ -0,0 +1,118 @@
+import os
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request, g
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = 'X-Trace-Id'
+# Incoming trace ids are only trusted if they look like one
+TRACE_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
+# Traces slower than this are logged with their full span breakdown
+SLOW_TRACE_MS = float(os.getenv('SLOW_TRACE_MS', 500))
+
+_current_trace = ContextVar('current_trace', default=None)
+
+class Span:
+    """A timed stage of a trace"""
+
+    def __init__(self, name):
+        self.name = name
+        self.duration_ms = 0.0
+
+class Trace:
+    """Spans recorded while handling one HTTP request or consumed message"""
+
+    def __init__(self, name, trace_id=None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self):
+        """Total duration per span name, in first-seen order"""
+        totals = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def log(self):
+        elapsed = self.elapsed_ms()
+        breakdown = ', '.join(f"{name}={ms:.1f}ms" for name, ms in self.summary().items())
+        message = f"Trace {self.trace_id} {self.name} took {elapsed:.1f}ms [{breakdown}]"
+        if elapsed >= SLOW_TRACE_MS:
+            logger.warning(message)
+        else:
+            logger.debug(message)
+
+def start_trace(name, trace_id=None):
+    """Start a trace in the current context; returns a token for end_trace()"""
+    trace = Trace(name, trace_id)
+    return trace, _current_trace.set(trace)
+
+def end_trace(trace, token):
+    trace.log()
+    _current_trace.reset(token)
+
+def current_trace():
+    return _current_trace.get()
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+@contextmanager
+def span(name):
+    """Time a block and record it on the current trace (if any)"""
+    current = Span(name)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(current)
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records serialization time as a span"""
+
+    def dumps(self, obj, **kwargs):
+        with span('serialize'):
+            return super().dumps(obj, **kwargs)
+
+def init_tracing(app):
+    """Register request tracing hooks on the Flask app"""
+    app.json = TracedJSONProvider(app)
+
+    @app.before_request
+    def begin_request_trace():
+        name = f"{request.method} {request.path}"
+        trace_id = request.headers.get(TRACE_HEADER)
+        if trace_id and not TRACE_ID_PATTERN.fullmatch(trace_id):
+            trace_id = None
+        g.trace, g.trace_token = start_trace(name, trace_id)
+
+    @app.after_request
+    def add_trace_headers(response):
+        trace = g.get('trace')
+        if trace is not None:
+            response.headers[TRACE_HEADER] = trace.trace_id
+            timings = [f"{name};dur={ms:.1f}" for name, ms in trace.summary().items()]
+            timings.append(f"total;dur={trace.elapsed_ms():.1f}")
+            response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    @app.teardown_request
+    def finish_request_trace(exc):
+        trace = g.pop('trace', None)
+        if trace is not None:
+            end_trace(trace, g.pop('trace_token'))
@@ -0,0 +1,110 @@
+-- Summary tables maintained incrementally by triggers on users.
+-- Users without a role are counted under the empty string.
+CREATE TABLE IF NOT EXISTS user_role_counts (
+    role VARCHAR(50) PRIMARY KEY,
+    user_count BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_signup_counts (
+    day DATE PRIMARY KEY,
+    user_count BIGINT NOT NULL DEFAULT 0
+);
+
+-- Each table is changed by a single upsert whose rows are sorted by key, so two
+-- updates moving users in opposite directions (X->Y and Y->X) lock the summary
+-- rows in the same order instead of deadlocking.
+CREATE OR REPLACE FUNCTION update_user_stats() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO user_role_counts (role, user_count)
+    SELECT role, SUM(delta) FROM (
+        SELECT COALESCE(OLD.role, '') AS role, -1 AS delta WHERE TG_OP IN ('DELETE', 'UPDATE')
+        UNION ALL
+        SELECT COALESCE(NEW.role, ''), 1 WHERE TG_OP IN ('INSERT', 'UPDATE')
+    ) changes
+    GROUP BY role
+    HAVING SUM(delta) <> 0
+    ORDER BY role
+    ON CONFLICT (role) DO UPDATE SET user_count = user_role_counts.user_count + EXCLUDED.user_count;
+
+    INSERT INTO user_signup_counts (day, user_count)
+    SELECT day, SUM(delta) FROM (
+        SELECT OLD.created_at::date AS day, -1 AS delta
+        WHERE TG_OP IN ('DELETE', 'UPDATE') AND OLD.created_at IS NOT NULL
+        UNION ALL
+        SELECT NEW.created_at::date, 1
+        WHERE TG_OP IN ('INSERT', 'UPDATE') AND NEW.created_at IS NOT NULL
+    ) changes
+    GROUP BY day
+    HAVING SUM(delta) <> 0
+    ORDER BY day
+    ON CONFLICT (day) DO UPDATE SET user_count = user_signup_counts.user_count + EXCLUDED.user_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_stats_insert_delete ON users;
+CREATE TRIGGER users_stats_insert_delete
+    AFTER INSERT OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION update_user_stats();
+
+DROP TRIGGER IF EXISTS users_stats_update ON users;
+CREATE TRIGGER users_stats_update
+    AFTER UPDATE OF role, created_at ON users
+    FOR EACH ROW
+    WHEN (OLD.role IS DISTINCT FROM NEW.role OR OLD.created_at IS DISTINCT FROM NEW.created_at)
+    EXECUTE FUNCTION update_user_stats();
+
+-- Correct drift between the summary tables and users without blocking writers.
+-- Each statement compares the summary with a COUNT(*) taken from the same
+-- snapshot and applies the difference as a delta, so trigger updates committed
+-- concurrently are preserved. Returns the number of corrected rows, or NULL if
+-- another reconciliation is already running.
+DROP FUNCTION IF EXISTS reconcile_user_stats();
+CREATE FUNCTION reconcile_user_stats() RETURNS INTEGER AS $$
+DECLARE
+    corrected INTEGER := 0;
+    changed INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('reconcile_user_stats')) THEN
+        RETURN NULL;
+    END IF;
+
+    WITH actual AS (
+        SELECT COALESCE(role, '') AS role, COUNT(*) AS user_count
+        FROM users GROUP BY COALESCE(role, '')
+    ), drift AS (
+        SELECT COALESCE(a.role, s.role) AS role,
+               COALESCE(a.user_count, 0) - COALESCE(s.user_count, 0) AS delta
+        FROM actual a FULL JOIN user_role_counts s ON s.role = a.role
+        WHERE COALESCE(a.user_count, 0) <> COALESCE(s.user_count, 0)
+    )
+    INSERT INTO user_role_counts (role, user_count)
+    SELECT role, delta FROM drift
+    ON CONFLICT (role) DO UPDATE SET user_count = user_role_counts.user_count + EXCLUDED.user_count;
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    corrected := corrected + changed;
+
+    WITH actual AS (
+        SELECT created_at::date AS day, COUNT(*) AS user_count
+        FROM users WHERE created_at IS NOT NULL GROUP BY created_at::date
+    ), drift AS (
+        SELECT COALESCE(a.day, s.day) AS day,
+               COALESCE(a.user_count, 0) - COALESCE(s.user_count, 0) AS delta
+        FROM actual a FULL JOIN user_signup_counts s ON s.day = a.day
+        WHERE COALESCE(a.user_count, 0) <> COALESCE(s.user_count, 0)
+    )
+    INSERT INTO user_signup_counts (day, user_count)
+    SELECT day, delta FROM drift
+    ON CONFLICT (day) DO UPDATE SET user_count = user_signup_counts.user_count + EXCLUDED.user_count;
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    corrected := corrected + changed;
+
+    DELETE FROM user_role_counts WHERE user_count = 0;
+    DELETE FROM user_signup_counts WHERE user_count = 0;
+
+    RETURN corrected;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_user_stats();
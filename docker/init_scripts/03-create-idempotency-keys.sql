@@ -0,0 +1,14 @@
+-- Responses recorded for Idempotency-Key requests, shared by all app replicas.
+-- A row with a NULL status_code is a request still in flight; its expires_at
+-- is a short lease so a crashed worker cannot block the key for the full TTL.
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint CHAR(64) NOT NULL,
+    owner CHAR(32) NOT NULL,
+    status_code INTEGER,
+    body BYTEA,
+    mimetype VARCHAR(100),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idempotency_keys_expires_at ON idempotency_keys (expires_at);
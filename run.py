@@ -1,6 +1,6 @@
 import os
 import sys
-from app.main import logger, init_message_broker, start_rabbitmq_consumer, app
+from app.main import logger, init_message_broker, start_rabbitmq_consumer, start_stats_reconciler, app
 from app.main import rabbitmq_connected
 
 if __name__ == '__main__':
@@ -23,6 +23,9 @@ if __name__ == '__main__':
         else:
             logger.warning("⚠ RabbitMQ not connected, skipping consumer startup")
 
+        # Periodically correct drift in the user stats summary tables
+        start_stats_reconciler()
+
         # Get Flask config
         port = int(os.getenv('FLASK_PORT', 5000))
         debug = os.getenv('FLASK_ENV') == 'development'